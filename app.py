@@ -1,21 +1,69 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
+import json
+import heapq
+import math
+import zlib
+import sys
+import time
+import atexit
+import signal
+import threading
 import requests
-from datetime import datetime
+from datetime import datetime, timedelta
+from itertools import islice
+from urllib.parse import quote
 import uuid
+from collections import Counter
+
+from supabase_rest import (
+    EXPORT_TABLES, HEADERS, SUPABASE_URL, export_line, export_trailer, iter_table_rows
+)
 
-SUPABASE_URL = os.environ.get("SUPABASE_URL")
-SUPABASE_API_KEY = os.environ.get("SUPABASE_API_KEY")
 SUPABASE_TABLE = "Carves"
 
-HEADERS = {
-    "apikey": SUPABASE_API_KEY,
-    "Authorization": f"Bearer {SUPABASE_API_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation"
+# Opt-in group commit for /descentLog: rows are spooled to disk and bulk inserted
+DESCENT_LOG_BUFFERED = os.environ.get("DESCENT_LOG_BUFFERED", "").lower() in ("1", "true", "yes")
+DESCENT_LOG_SPOOL = os.environ.get("DESCENT_LOG_SPOOL", "descent_logs.spool")
+DESCENT_LOG_FLUSH_ROWS = int(os.environ.get("DESCENT_LOG_FLUSH_ROWS", 500))
+DESCENT_LOG_FLUSH_MS = int(os.environ.get("DESCENT_LOG_FLUSH_MS", 200))
+
+# Admission control: per-client token buckets plus bounded concurrency on heavy routes
+ADMISSION_CONTROL = os.environ.get("ADMISSION_CONTROL", "1").lower() in ("1", "true", "yes")
+RATE_LIMIT_RATE = float(os.environ.get("RATE_LIMIT_RATE", 10))  # tokens per second per client
+RATE_LIMIT_BURST = float(os.environ.get("RATE_LIMIT_BURST", 60))
+HEAVY_ROUTE_CONCURRENCY = int(os.environ.get("HEAVY_ROUTE_CONCURRENCY", 4))
+HEAVY_ROUTE_QUEUE = int(os.environ.get("HEAVY_ROUTE_QUEUE", 8))
+HEAVY_ROUTE_QUEUE_TIMEOUT = float(os.environ.get("HEAVY_ROUTE_QUEUE_TIMEOUT", 2.0))
+PROXY_HOPS = int(os.environ.get("PROXY_HOPS", 1))  # Render puts one proxy in front of us
+
+# Reflex routes score against a shared in-memory snapshot of Echoes, Figures and Spine
+SNAPSHOT_REFRESH_SECONDS = float(os.environ.get("SNAPSHOT_REFRESH_SECONDS", 2))
+SNAPSHOT_RESYNC_SECONDS = float(os.environ.get("SNAPSHOT_RESYNC_SECONDS", 600))
+SNAPSHOT_LOOKBACK_SECONDS = 60  # re-read recent rows so late or same-timestamp inserts are not missed
+
+# Only full-table routes are charged by default; set the other costs to limit everything
+ROUTE_COSTS = {
+    "heavy": float(os.environ.get("RATE_LIMIT_HEAVY_COST", 10)),
+    "write": float(os.environ.get("RATE_LIMIT_WRITE_COST", 0)),
+    "read": float(os.environ.get("RATE_LIMIT_READ_COST", 0)),
+}
+# Routes that download whole tables on every call
+HEAVY_ROUTES = {
+    "search_carves",
+    "reflex_carves",
+    "list_echo_tags",
+    "top_echo_tags",
+    "list_echoes_by_tag_count",
+    "export_tables",
 }
+ADMISSION_EXEMPT = {"metrics", "static"}
 
 app = Flask(__name__)
+if PROXY_HOPS:
+    # Take the client address from X-Forwarded-For so rate limits are per caller, not per proxy
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS, x_proto=0)
 
 # In-memory storage for dev (replace with Supabase later if needed)
 memory_triggers = []
@@ -23,6 +71,160 @@ trace_mode = {"mode": "logged"}  # Options: silent, logged, verbose
 auto_carve_status = {"enabled": True}
 
 
+class TokenBucketLimiter:
+    def __init__(self, rate, burst, max_clients=10000):
+        if rate <= 0 or burst <= 0:
+            raise ValueError("RATE_LIMIT_RATE and RATE_LIMIT_BURST must be positive; use ADMISSION_CONTROL=0 to disable")
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets = {}  # client -> (tokens, last refill), least recently seen first
+        self.lock = threading.Lock()
+        # A bucket idle this long is full again, so pruning more often finds nothing new
+        self.prune_interval = burst / rate
+        self.pruned_at = time.monotonic()
+
+    def take(self, client, cost):
+        # Returns 0 when admitted, otherwise seconds until `cost` tokens are available
+        cost = min(cost, self.burst)
+        now = time.monotonic()
+        with self.lock:
+            # Popped and re-inserted below so dict order tracks recency
+            bucket = self.buckets.pop(client, None)
+            if bucket is None:
+                if len(self.buckets) >= self.max_clients:
+                    self._make_room(now)
+                bucket = (self.burst, now)
+            tokens, last = bucket
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= cost:
+                self.buckets[client] = (tokens - cost, now)
+                return 0
+            self.buckets[client] = (tokens, now)
+            return (cost - tokens) / self.rate
+
+    def _make_room(self, now):
+        # Idle buckets have refilled completely, so forgetting them changes nothing
+        if now - self.pruned_at >= self.prune_interval:
+            self.pruned_at = now
+            for client, (_, last) in list(self.buckets.items()):
+                if now - last >= self.prune_interval:
+                    del self.buckets[client]
+        # Still full of active clients: evict the least recently seen to keep the table bounded
+        while len(self.buckets) >= self.max_clients:
+            del self.buckets[next(iter(self.buckets))]
+
+
+class ConcurrencyGate:
+    def __init__(self, limit, max_queue, timeout):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        # Returns None when admitted, otherwise the reason for rejecting
+        with self.cond:
+            if self.active < self.limit:
+                self.active += 1
+                return None
+            if self.waiting >= self.max_queue:
+                return "queue_full"
+            self.waiting += 1
+            try:
+                admitted = self.cond.wait_for(lambda: self.active < self.limit, timeout=self.timeout)
+            finally:
+                self.waiting -= 1
+            if not admitted:
+                return "queue_timeout"
+            self.active += 1
+            return None
+
+    def release(self):
+        with self.cond:
+            self.active -= 1
+            self.cond.notify()
+
+
+rate_limiter = TokenBucketLimiter(RATE_LIMIT_RATE, RATE_LIMIT_BURST) if ADMISSION_CONTROL else None
+route_gates = {
+    endpoint: ConcurrencyGate(HEAVY_ROUTE_CONCURRENCY, HEAVY_ROUTE_QUEUE, HEAVY_ROUTE_QUEUE_TIMEOUT)
+    for endpoint in HEAVY_ROUTES
+}
+admission_stats = {"admitted": Counter(), "rejected": Counter()}
+admission_stats_lock = threading.Lock()
+
+
+def count_admission(outcome, key):
+    with admission_stats_lock:
+        admission_stats[outcome][key] += 1
+
+
+def route_class(endpoint, method):
+    if endpoint in HEAVY_ROUTES:
+        return "heavy"
+    return "read" if method in ("GET", "HEAD", "OPTIONS") else "write"
+
+
+def route_cost(endpoint, method):
+    # Buffered descent logs are meant to be cheap at high frequency, so they are never charged
+    if endpoint == "create_descent_log" and descent_log_buffer:
+        return 0
+    return ROUTE_COSTS[route_class(endpoint, method)]
+
+
+@app.before_request
+def admit_request():
+    endpoint = request.endpoint
+    if not ADMISSION_CONTROL or endpoint is None or endpoint in ADMISSION_EXEMPT:
+        return None
+
+    cost = route_cost(endpoint, request.method)
+    retry_after = rate_limiter.take(request.remote_addr, cost) if cost else 0
+    if retry_after:
+        count_admission("rejected", f"{endpoint}:rate_limited")
+        res = jsonify({"error": "Rate limit exceeded", "retryAfter": math.ceil(retry_after)})
+        return res, 429, {"Retry-After": str(math.ceil(retry_after))}
+
+    gate = route_gates.get(endpoint)
+    if gate:
+        reason = gate.acquire()
+        if reason:
+            count_admission("rejected", f"{endpoint}:{reason}")
+            retry_after = math.ceil(gate.timeout) or 1
+            res = jsonify({"error": "Server busy", "retryAfter": retry_after})
+            return res, 503, {"Retry-After": str(retry_after)}
+        g.admission_gate = gate
+
+    count_admission("admitted", endpoint)
+    return None
+
+
+@app.teardown_request
+def release_admission(exc):
+    gate = g.pop("admission_gate", None)
+    if gate:
+        gate.release()
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    with admission_stats_lock:
+        admitted = dict(admission_stats["admitted"])
+        rejected = dict(admission_stats["rejected"])
+
+    return jsonify({
+        "admitted": admitted,
+        "rejected": rejected,
+        "inFlight": {
+            endpoint: {"active": gate.active, "waiting": gate.waiting}
+            for endpoint, gate in route_gates.items()
+        }
+    }), 200
+
+
 @app.route("/carves", methods=["POST"])
 def create_carve():
     data = request.json
@@ -72,6 +274,7 @@ def create_carve():
             )
 
             if echo_res.ok:
+                memory_snapshot.mark_stale()
                 response_data["echo_suggested"] = True
                 response_data["suggested_echo"] = echo["phrase"]
             break  # Stop after first qualifying quote
@@ -207,6 +410,7 @@ def create_echo():
         headers=HEADERS,
         json=echo
     )
+    memory_snapshot.mark_stale()
     try:
         return jsonify(res.json()[0]), res.status_code
     except (KeyError, IndexError, TypeError):
@@ -247,6 +451,7 @@ def create_spine_entry():
         "vow": data.get("vow", False)
     }
     res = requests.post(f"{SUPABASE_URL}/rest/v1/Spine", headers=HEADERS, json=entry)
+    memory_snapshot.mark_stale()
     try:
         return jsonify(res.json()[0]), res.status_code
     except (KeyError, IndexError, TypeError):
@@ -380,6 +585,7 @@ def create_figure():
         headers=HEADERS,
         json=figure
     )
+    memory_snapshot.mark_stale()
 
     try:
         return jsonify(res.json()[0]), res.status_code
@@ -459,34 +665,36 @@ def recall_echoes_by_tag():
         return jsonify({"error": "Echo recall failed", "details": str(e)}), 500
 
 
-@app.route("/listEchoTags", methods=["GET"])
-def list_echo_tags():
+def summarize_echo_tags():
     url = f"{SUPABASE_URL}/rest/v1/Echoes?select=tags,phrase"
+    res = requests.get(url, headers=HEADERS)
+    res.raise_for_status()
+    data = res.json()
+
+    tag_index = {}
+
+    for echo in data:
+        for tag in echo.get("tags", []):
+            if tag not in tag_index:
+                tag_index[tag] = {"count": 0, "examples": []}
+            tag_index[tag]["count"] += 1
+            if len(tag_index[tag]["examples"]) < 3:
+                tag_index[tag]["examples"].append(echo.get("phrase"))
+
+    return [
+        {
+            "tag": tag,
+            "count": tag_index[tag]["count"],
+            "examples": tag_index[tag]["examples"]
+        }
+        for tag in sorted(tag_index, key=lambda t: tag_index[t]["count"], reverse=True)
+    ]
 
-    try:
-        res = requests.get(url, headers=HEADERS)
-        data = res.json()
-
-        tag_index = {}
-
-        for echo in data:
-            for tag in echo.get("tags", []):
-                if tag not in tag_index:
-                    tag_index[tag] = {"count": 0, "examples": []}
-                tag_index[tag]["count"] += 1
-                if len(tag_index[tag]["examples"]) < 3:
-                    tag_index[tag]["examples"].append(echo.get("phrase"))
-
-        tag_summary = [
-            {
-                "tag": tag,
-                "count": tag_index[tag]["count"],
-                "examples": tag_index[tag]["examples"]
-            }
-            for tag in sorted(tag_index, key=lambda t: tag_index[t]["count"], reverse=True)
-        ]
 
-        return jsonify(tag_summary), 200
+@app.route("/listEchoTags", methods=["GET"])
+def list_echo_tags():
+    try:
+        return jsonify(summarize_echo_tags()), 200
 
     except Exception as e:
         print("Failed to list echo tags:", str(e))
@@ -496,11 +704,8 @@ def list_echo_tags():
 def top_echo_tags():
     try:
         limit = int(request.args.get("limit", 5))
-        full_url = request.url_root.rstrip("/") + "/listEchoTags"
-        res = requests.get(full_url)
-        all_tags = res.json()
-
-        top = sorted(all_tags, key=lambda t: t["count"], reverse=True)[:limit]
+        # Already sorted by count; computed here rather than via an HTTP call to /listEchoTags
+        top = summarize_echo_tags()[:limit]
         return jsonify(top), 200
 
     except Exception as e:
@@ -586,43 +791,272 @@ def set_trace_mode():
     else:
         return jsonify({"error": "Failed to update trace mode", "details": res.text}), 500
 
+# One snapshot row: a values tuple (columns shared per row shape) plus the lowercased text reflexes match on
+class SnapshotRecord:
+    __slots__ = ("columns", "values", "timestamp")
+
+    def __init__(self, columns, values, timestamp):
+        self.columns = columns
+        self.values = values
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_row(cls, row, shapes):
+        columns = tuple(row)
+        columns = shapes.setdefault(columns, columns)
+        values = tuple(
+            tuple(sys.intern(t) if isinstance(t, str) else t for t in value)
+            if isinstance(value, list) else value
+            for value in row.values()
+        )
+        record = cls(columns, values, row.get("timestamp") or "")
+        record.index(row)
+        return record
+
+    def index(self, row):
+        pass
+
+    def as_dict(self):
+        return dict(zip(self.columns, self.values))
+
+
+def lowered(value):
+    # None for missing or empty text, since "" is a substring of every context.
+    # Reuse the original string when it is already lowercase instead of storing a copy.
+    if not value:
+        return None
+    lower = value.lower()
+    return value if lower == value else lower
+
+
+def by_timestamp(record):
+    return record.timestamp
+
+
+def deep_size(obj, seen):
+    # Deep size of obj; anything already in `seen` (shared or interned objects) counts once
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    total = sys.getsizeof(obj)
+    if isinstance(obj, (tuple, list, set, frozenset)):
+        total += sum(deep_size(item, seen) for item in obj)
+    elif isinstance(obj, dict):
+        total += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, SnapshotRecord):
+        for cls in type(obj).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                total += deep_size(getattr(obj, slot), seen)
+    return total
+
+
+class EchoRecord(SnapshotRecord):
+    __slots__ = ("phrase_lower", "tags_lower")
+
+    def index(self, row):
+        self.phrase_lower = lowered(row.get("phrase"))
+        self.tags_lower = tuple(sys.intern(t.lower()) for t in row.get("tags") or [] if t)
+
+
+class FigureRecord(SnapshotRecord):
+    __slots__ = ("name_lower", "impact_lower")
+
+    def index(self, row):
+        self.name_lower = lowered(row.get("name"))
+        self.impact_lower = lowered(row.get("impact"))
+
+
+class SpineRecord(SnapshotRecord):
+    __slots__ = ("statement_lower",)
+
+    def index(self, row):
+        self.statement_lower = lowered(row.get("statement"))
+
+
+class TableSnapshot:
+    def __init__(self, table, record_type):
+        self.table = table
+        self.record_type = record_type
+        self.records = ()  # replaced wholesale, never mutated, so readers need no lock
+        self.ids = set()
+        self.latest = None
+        self.bytes = 0  # measured on full loads, topped up by extend
+
+    def load(self, rows, shapes):
+        records = []
+        ids = set()
+        latest = None
+        for row in rows:
+            records.append(self.record_type.from_row(row, shapes))
+            ids.add(row["id"])
+            latest = max(latest or "", row.get("timestamp") or "") or None
+        # Pages arrive in id order; keep rows oldest first like the tables' natural order
+        records.sort(key=by_timestamp)
+        self.records = tuple(records)
+        self.ids = ids
+        self.latest = latest
+
+    def measure(self, seen):
+        self.bytes = deep_size(self.records, seen) + deep_size(self.ids, seen)
+
+    def extend(self, rows, shapes, seen):
+        # Build everything locally so a failed page leaves the snapshot untouched
+        added = []
+        new_ids = set()
+        latest = self.latest
+        for row in rows:
+            if row["id"] in self.ids or row["id"] in new_ids:
+                continue
+            added.append(self.record_type.from_row(row, shapes))
+            new_ids.add(row["id"])
+            latest = max(latest or "", row.get("timestamp") or "") or None
+        if not added:
+            return
+
+        # Lookback rows can predate the newest record; the sort is near-linear on sorted input
+        records = tuple(sorted(self.records + tuple(added), key=by_timestamp))
+        ids = self.ids | new_ids
+        # Only the new rows are walked; interned tags they share with older rows may count twice
+        grown = sys.getsizeof(records) - sys.getsizeof(self.records) + sys.getsizeof(ids) - sys.getsizeof(self.ids)
+        self.bytes += (grown + sum(deep_size(record, seen) for record in added)
+                       + sum(deep_size(record_id, seen) for record_id in new_ids))
+        self.records, self.ids, self.latest = records, ids, latest
+
+    def since_filter(self):
+        if not self.latest:
+            return ""
+        since = datetime.fromisoformat(self.latest) - timedelta(seconds=SNAPSHOT_LOOKBACK_SECONDS)
+        return f"&timestamp=gt.{quote(since.isoformat())}"
+
+
+# Shared read-only copy of Echoes, Figures and Spine, topped up with new rows and fully reloaded every resync_seconds
+class MemorySnapshot:
+    def __init__(self, refresh_seconds, resync_seconds):
+        self.refresh_seconds = refresh_seconds
+        self.resync_seconds = resync_seconds
+        self.tables = {
+            "Echoes": TableSnapshot("Echoes", EchoRecord),
+            "Figures": TableSnapshot("Figures", FigureRecord),
+            "Spine": TableSnapshot("Spine", SpineRecord),
+        }
+        self.shapes = {}
+        self.shapes_bytes = 0
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.refreshed_at = 0.0
+        self.resynced_at = 0.0
+
+    @property
+    def echoes(self):
+        return self.tables["Echoes"].records
+
+    @property
+    def figures(self):
+        return self.tables["Figures"].records
+
+    @property
+    def spine(self):
+        return self.tables["Spine"].records
+
+    def mark_stale(self):
+        self.refreshed_at = 0.0
+
+    def current(self):
+        if not self.loaded:
+            with self.lock:
+                if not self.loaded:
+                    self._refresh(full=True)
+                    self.loaded = True
+        elif time.monotonic() - self.refreshed_at >= self.refresh_seconds and self.lock.acquire(blocking=False):
+            try:
+                self._refresh(full=time.monotonic() - self.resynced_at >= self.resync_seconds)
+            except Exception as e:
+                print("Memory snapshot refresh failed:", str(e))
+            finally:
+                self.lock.release()
+        return self
+
+    def _refresh(self, full):
+        # Sizes are measured here, once per refresh, so /memorySnapshot never walks the tables
+        if full:
+            for snapshot in self.tables.values():
+                snapshot.load(iter_table_rows(snapshot.table), self.shapes)
+            seen = set()
+            self.shapes_bytes = deep_size(self.shapes, seen)
+            for snapshot in self.tables.values():
+                snapshot.measure(seen)
+        else:
+            for snapshot in self.tables.values():
+                seen = set()
+                deep_size(self.shapes, seen)
+                snapshot.extend(iter_table_rows(snapshot.table, filters=snapshot.since_filter()), self.shapes, seen)
+            self.shapes_bytes = deep_size(self.shapes, set())
+        now = time.monotonic()
+        self.refreshed_at = now
+        if full:
+            self.resynced_at = now
+
+    def footprint(self):
+        tables = {
+            name: {
+                "rows": len(snapshot.records),
+                "bytes": snapshot.bytes,
+                "bytesPerRow": round(snapshot.bytes / len(snapshot.records)) if snapshot.records else 0,
+            }
+            for name, snapshot in self.tables.items()
+        }
+        return {
+            "tables": tables,
+            "shapes": len(self.shapes),
+            "totalBytes": sum(t["bytes"] for t in tables.values()) + self.shapes_bytes,
+            "secondsSinceRefresh": round(time.monotonic() - self.refreshed_at, 1) if self.loaded else None,
+            "secondsSinceResync": round(time.monotonic() - self.resynced_at, 1) if self.loaded else None,
+        }
+
+
+memory_snapshot = MemorySnapshot(SNAPSHOT_REFRESH_SECONDS, SNAPSHOT_RESYNC_SECONDS)
+
+
+@app.route("/memorySnapshot", methods=["GET"])
+def get_memory_snapshot():
+    try:
+        return jsonify(memory_snapshot.current().footprint()), 200
+    except Exception as e:
+        print("Memory snapshot report failed:", str(e))
+        return jsonify({"error": "Memory snapshot report failed", "details": str(e)}), 500
+
+
 @app.route("/runMemoryReflex", methods=["POST"])
 def run_memory_reflex():
     try:
         context = request.json.get("context", "").lower()
 
-        # Step 1: Pull all echoes and figures (or limit if needed)
-        echo_res = requests.get(f"{SUPABASE_URL}/rest/v1/Echoes", headers=HEADERS)
-        figure_res = requests.get(f"{SUPABASE_URL}/rest/v1/Figures", headers=HEADERS)
-        spine_res = requests.get(f"{SUPABASE_URL}/rest/v1/Spine", headers=HEADERS)
+        # Step 1: Use the shared snapshot of echoes, figures and spine
+        snapshot = memory_snapshot.current()
 
-        echoes = echo_res.json() if echo_res.ok else []
-        figures = figure_res.json() if figure_res.ok else []
-        spine = spine_res.json() if spine_res.ok else []
+        # Step 2: Scan for matching phrases/tags in context, stopping once we have enough
+        matching_echoes = islice((
+            e for e in snapshot.echoes
+            if any(tag in context for tag in e.tags_lower)
+            or (e.phrase_lower and e.phrase_lower in context)
+        ), 2)
 
-        # Step 2: Scan for matching phrases/tags in context
-        matching_echoes = [
-            e for e in echoes
-            if any(tag.lower() in context for tag in e.get("tags", []))
-            or (e.get("phrase", "").lower() in context)
-        ]
+        matching_figures = islice((
+            f for f in snapshot.figures
+            if (f.name_lower and f.name_lower in context) or
+               (f.impact_lower and f.impact_lower in context)
+        ), 1)
 
-        matching_figures = [
-            f for f in figures
-            if f.get("name", "").lower() in context or
-               f.get("impact", "").lower() in context
-        ]
-
-        matching_spine = [
-            s for s in spine
-            if s.get("statement", "").lower() in context
-        ]
+        matching_spine = islice((
+            s for s in snapshot.spine
+            if s.statement_lower and s.statement_lower in context
+        ), 1)
 
         # Step 3: Return a compact bundle of memory traces
         response = {
-            "echoes": matching_echoes[:2],
-            "figures": matching_figures[:1],
-            "spine": matching_spine[:1]
+            "echoes": [e.as_dict() for e in matching_echoes],
+            "figures": [f.as_dict() for f in matching_figures],
+            "spine": [s.as_dict() for s in matching_spine]
         }
 
         return jsonify(response), 200
@@ -673,26 +1107,21 @@ def reflex_echoes():
     context = data.get("context", "").lower()
 
     try:
-        # Pull all echoes
-        url = f"{SUPABASE_URL}/rest/v1/Echoes"
-        res = requests.get(url, headers=HEADERS)
-        all_echoes = res.json()
+        snapshot = memory_snapshot.current()
 
         # Rank echoes by tag/phrase match to context
         def score(echo):
             score = 0
-            phrase = echo.get("phrase", "").lower()
-            tags = [t.lower() for t in echo.get("tags", [])]
-            if any(tag in context for tag in tags):
+            if any(tag in context for tag in echo.tags_lower):
                 score += 1
-            if phrase in context:
+            if echo.phrase_lower and echo.phrase_lower in context:
                 score += 2
             return score
 
-        sorted_echoes = sorted(all_echoes, key=score, reverse=True)
-        top_echoes = sorted_echoes[:2]
+        # Same result as a stable sort of the snapshot (oldest first) then [:2], without sorting every echo
+        top_echoes = heapq.nlargest(2, snapshot.echoes, key=score)
 
-        return jsonify(top_echoes), 200
+        return jsonify([e.as_dict() for e in top_echoes]), 200
 
     except Exception as e:
         print("Reflex echo retrieval failed:", str(e))
@@ -728,6 +1157,160 @@ def reflex_carves():
         print("Reflex carve retrieval failed:", str(e))
         return jsonify({"error": "Carve reflex failed", "details": str(e)}), 500
 
+# Group commit for descent_logs: rows are fsynced to a spool, then bulk inserted by size or time
+class DescentLogBuffer:
+    def __init__(self, spool_path, max_rows=500, max_wait_ms=200):
+        self.spool_path = spool_path
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self.rows = []
+        # Lock order is sync_lock, then lock
+        self.lock = threading.Lock()
+        self.wake = threading.Condition(self.lock)
+        self.sync_lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.written = 0  # rows written to the spool file
+        self.synced = 0  # rows known to be on disk
+        self.stopped = False
+
+        self._recover()
+        self.spool = open(self.spool_path, "a", encoding="utf-8")
+        self.thread = threading.Thread(target=self._run, name="descent-log-flush", daemon=True)
+        self.thread.start()
+
+    def _recover(self):
+        # Pick up rows left behind by a previous process
+        if os.path.exists(self.spool_path):
+            with open(self.spool_path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        self.rows.append(json.loads(line))
+                    except ValueError:
+                        print("Skipping corrupt descent log spool line:", line[:80])
+
+        if self.rows:
+            print(f"Recovered {len(self.rows)} spooled descent logs")
+        self._write_spool(self.rows)
+
+    def _write_spool(self, rows):
+        # Atomically replace the spool with exactly `rows`
+        tmp_path = self.spool_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.spool_path)
+
+    def append(self, row):
+        line = json.dumps(row) + "\n"
+        with self.lock:
+            if self.stopped:
+                raise RuntimeError("Descent log buffer is closed")
+            self.spool.write(line)
+            self.spool.flush()
+            self.rows.append(row)
+            self.written += 1
+            position = self.written
+            self.wake.notify()
+
+        # One fsync covers every row written before it, so appenders queued
+        # behind a sync in progress usually find their row already on disk
+        with self.sync_lock:
+            if self.synced >= position:
+                return
+            with self.lock:
+                target = self.written
+                fd = self.spool.fileno()
+            os.fsync(fd)
+            self.synced = target
+
+    def _compact(self):
+        # Drop inserted rows from the spool, keeping the ones that arrived since
+        with self.sync_lock, self.lock:
+            self._write_spool(self.rows)
+            self.spool.close()
+            self.spool = open(self.spool_path, "a", encoding="utf-8")
+            self.synced = self.written
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                batch, self.rows = self.rows, []
+            if not batch:
+                return True
+
+            ok = True
+            try:
+                for i in range(0, len(batch), self.max_rows):
+                    res = requests.post(
+                        f"{SUPABASE_URL}/rest/v1/descent_logs?on_conflict=id",
+                        headers={**HEADERS, "Prefer": "resolution=ignore-duplicates,return=minimal"},
+                        json=batch[i:i + self.max_rows]
+                    )
+                    if not res.ok:
+                        print("Descent log bulk insert failed:", res.status_code, res.text)
+                        ok = False
+                        break
+            except Exception as e:
+                print("Descent log bulk insert exception:", str(e))
+                ok = False
+
+            if not ok:
+                # Keep the whole batch (it is still in the spool); rows already inserted are ignored on retry
+                with self.lock:
+                    self.rows = batch + self.rows
+                return False
+
+            try:
+                self._compact()
+            except Exception as e:
+                # The old spool is still a superset of what is pending, so nothing is lost
+                print("Descent log spool compaction failed:", str(e))
+            return True
+
+    def _run(self):
+        while True:
+            with self.lock:
+                self.wake.wait_for(lambda: self.rows or self.stopped)
+                self.wake.wait_for(lambda: len(self.rows) >= self.max_rows or self.stopped,
+                                   timeout=self.max_wait)
+                if self.stopped:
+                    return
+            try:
+                ok = self.flush()
+            except Exception as e:
+                print("Descent log flush failed:", str(e))
+                ok = False
+            if not ok:
+                # Back off instead of hammering Supabase while it is failing
+                time.sleep(max(self.max_wait, 1.0))
+
+    def close(self):
+        with self.lock:
+            if self.stopped:
+                return
+            self.stopped = True
+            self.wake.notify_all()
+        self.thread.join()
+        try:
+            ok = self.flush()
+        except Exception as e:
+            print("Descent log flush failed:", str(e))
+            ok = False
+        if not ok:
+            print(f"Descent logs left in {self.spool_path} for the next start")
+        self.spool.close()
+
+descent_log_buffer = None
+if DESCENT_LOG_BUFFERED:
+    descent_log_buffer = DescentLogBuffer(DESCENT_LOG_SPOOL, DESCENT_LOG_FLUSH_ROWS, DESCENT_LOG_FLUSH_MS)
+    atexit.register(descent_log_buffer.close)
+
+
 @app.route("/descentLog", methods=["POST"])
 def create_descent_log():
     data = request.json
@@ -739,6 +1322,13 @@ def create_descent_log():
         "echo": data.get("echo")
     }
 
+    if descent_log_buffer:
+        try:
+            descent_log_buffer.append(payload)
+            return jsonify(payload), 202
+        except Exception as e:
+            return jsonify({"error": "Spool write failed", "details": str(e)}), 500
+
     try:
         res = requests.post(
             f"{SUPABASE_URL}/rest/v1/descent_logs",
@@ -754,5 +1344,45 @@ def create_descent_log():
         return jsonify({"error": "Insert exception", "details": str(e)}), 500
 
 
+def export_ndjson_gz(tables):
+    # One {"table", "row"} object per line, gzipped as it is produced, then a trailer.
+    # The response is already a 200 by the time a page can fail, so a failure
+    # is reported in the trailer instead.
+    compressor = zlib.compressobj(wbits=31)
+    rows = 0
+    error = None
+    try:
+        for table in tables:
+            for row in iter_table_rows(table):
+                chunk = compressor.compress(export_line(table, row).encode("utf-8"))
+                rows += 1
+                if chunk:
+                    yield chunk
+    except Exception as e:
+        print(f"Export failed after {rows} rows:", str(e))
+        error = str(e)
+    yield compressor.compress(export_trailer(rows, error).encode("utf-8"))
+    yield compressor.flush()
+
+
+@app.route("/export", methods=["GET"])
+def export_tables():
+    tables = request.args.get("tables")
+    tables = tables.split(",") if tables else EXPORT_TABLES
+
+    unknown = [t for t in tables if t not in EXPORT_TABLES]
+    if unknown:
+        return jsonify({"error": "Unknown tables", "details": unknown}), 400
+
+    filename = f"nameless-export-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.ndjson.gz"
+    return Response(
+        stream_with_context(export_ndjson_gz(tables)),
+        mimetype="application/gzip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=10000)
+    # Turn SIGTERM into a normal exit so atexit flushes buffered writes
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 10000)))
@@ -0,0 +1,281 @@
+"""In-memory stand-in for the Supabase REST API, for offline benchmarks.
+
+Implements the slice of PostgREST that app.py relies on: eq, gt, lt,
+ilike and cs filters, order, limit, offset and select on GET, plus
+POST (single or bulk, with resolution=ignore-duplicates), PATCH and
+DELETE. Every request can be delayed to mimic the network round trip.
+
+    python bench/fake_supabase.py --port 54321 --carves 10000 --echoes 10000 --latency-ms 5
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import Flask, Response, request
+
+app = Flask(__name__)
+
+tables = {}  # table -> {id: row}, in insertion order
+tables_lock = threading.Lock()
+latency = {"base": 0.0, "jitter": 0.0}
+
+OPERATORS = ("eq", "gt", "lt", "ilike", "cs")
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def parse_array(value):
+    # cs accepts a JSON array (["a"]) or a Postgres array literal ({"a","b"})
+    if value.startswith("["):
+        return json.loads(value)
+    items = value.strip("{}")
+    return [item.strip().strip('"') for item in items.split(",") if item.strip()]
+
+
+def compare_value(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None:
+        return "null"
+    return str(value)
+
+
+def make_filter(column, expression):
+    op, _, value = expression.partition(".")
+    if op not in OPERATORS:
+        raise ValueError(f"Unsupported operator: {expression}")
+
+    if op == "eq":
+        return lambda row: compare_value(row.get(column)) == value
+    if op == "gt":
+        return lambda row: row.get(column) is not None and compare_value(row.get(column)) > value
+    if op == "lt":
+        return lambda row: row.get(column) is not None and compare_value(row.get(column)) < value
+    if op == "ilike":
+        pattern = re.compile(
+            "^" + ".*".join(re.escape(part) for part in re.split(r"[*%]", value)) + "$",
+            re.IGNORECASE | re.DOTALL
+        )
+        return lambda row: isinstance(row.get(column), str) and bool(pattern.match(row[column]))
+    wanted = parse_array(value)
+    return lambda row: all(item in (row.get(column) or []) for item in wanted)
+
+
+def apply_order(rows, order):
+    # Sort by the last key first so earlier keys take precedence; nulls go last either way
+    for term in reversed(order.split(",")):
+        column, _, direction = term.partition(".")
+        descending = direction.startswith("desc")
+        present = [r for r in rows if r.get(column) is not None]
+        missing = [r for r in rows if r.get(column) is None]
+        present.sort(key=lambda r: r[column], reverse=descending)
+        rows = present + missing
+    return rows
+
+
+def respond(body, status):
+    return Response(json.dumps(body), status=status, mimetype="application/json")
+
+
+def prefers(option):
+    return option in request.headers.get("Prefer", "")
+
+
+def select_rows(table):
+    filters = [
+        make_filter(column, expression)
+        for column, expression in request.args.items(multi=True)
+        if column not in RESERVED_PARAMS
+    ]
+    with tables_lock:
+        rows = list(tables.get(table, {}).values())
+    return [row for row in rows if all(f(row) for f in filters)]
+
+
+@app.before_request
+def inject_latency():
+    delay = latency["base"] + random.uniform(0, latency["jitter"])
+    if delay:
+        time.sleep(delay)
+
+
+@app.route("/rest/v1/<table>", methods=["GET"])
+def get_rows(table):
+    try:
+        rows = select_rows(table)
+    except ValueError as e:
+        return respond({"message": str(e)}, 400)
+
+    if request.args.get("order"):
+        rows = apply_order(rows, request.args["order"])
+    offset = int(request.args.get("offset", 0))
+    limit = request.args.get("limit")
+    rows = rows[offset:offset + int(limit)] if limit else rows[offset:]
+
+    select = request.args.get("select")
+    if select and select != "*":
+        columns = select.split(",")
+        rows = [{c: row.get(c) for c in columns} for row in rows]
+
+    return respond(rows, 200)
+
+
+@app.route("/rest/v1/<table>", methods=["POST"])
+def insert_rows(table):
+    data = request.json
+    rows = data if isinstance(data, list) else [data]
+    ignore_duplicates = prefers("resolution=ignore-duplicates")
+
+    inserted = []
+    with tables_lock:
+        store = tables.setdefault(table, {})
+        for row in rows:
+            row = dict(row)
+            row.setdefault("id", str(uuid.uuid4()))
+            if row["id"] in store:
+                if ignore_duplicates:
+                    continue
+                return respond({"message": "duplicate key value violates unique constraint"}, 409)
+            store[row["id"]] = row
+            inserted.append(row)
+
+    if prefers("return=representation"):
+        return respond(inserted, 201)
+    return Response(status=201)
+
+
+@app.route("/rest/v1/<table>", methods=["PATCH"])
+def update_rows(table):
+    try:
+        matches = select_rows(table)
+    except ValueError as e:
+        return respond({"message": str(e)}, 400)
+
+    changes = request.json
+    updated = []
+    with tables_lock:
+        store = tables.get(table, {})
+        # Swap in new dicts so concurrent readers never see a row mid-update
+        for row in matches:
+            if row["id"] in store:
+                store[row["id"]] = {**row, **changes}
+                updated.append(store[row["id"]])
+
+    if prefers("return=representation"):
+        return respond(updated, 200)
+    return Response(status=204)
+
+
+@app.route("/rest/v1/<table>", methods=["DELETE"])
+def delete_rows(table):
+    try:
+        matches = select_rows(table)
+    except ValueError as e:
+        return respond({"message": str(e)}, 400)
+
+    with tables_lock:
+        store = tables.get(table, {})
+        for row in matches:
+            store.pop(row["id"], None)
+
+    if prefers("return=representation"):
+        return respond(matches, 200)
+    return Response(status=204)
+
+
+WORDS = (
+    "ember spine anchor river silence vow threshold lantern descent echo figure "
+    "memory ash root tide quiet signal thread harbor stone glass oath return "
+    "weight light distance mirror hunger shelter grief witness"
+).split()
+
+
+def seed_corpus(carves, echoes, seed=0):
+    # Deterministic, roughly realistic rows: short phrases, a few tags, recent timestamps
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+
+    def text(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n))
+
+    def stamp():
+        return (start + timedelta(seconds=rng.randrange(0, 3600 * 24 * 365))).isoformat()
+
+    def new_id():
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def fill(table, count, make_row):
+        store = tables.setdefault(table, {})
+        for _ in range(count):
+            row = make_row()
+            row["id"] = new_id()
+            row["timestamp"] = stamp()
+            store[row["id"]] = row
+
+    fill("Carves", carves, lambda: {
+        "title": text(4).title(),
+        "summary": text(30),
+        "moments": [text(8) for _ in range(3)],
+        "key_entities": rng.sample(WORDS, 2),
+        "insights": [text(10) for _ in range(2)],
+        "quotes": [text(12) for _ in range(2)],
+        "closing": text(6),
+    })
+    fill("Echoes", echoes, lambda: {
+        "phrase": text(rng.randint(3, 10)),
+        "tags": rng.sample(WORDS, rng.randint(1, 4)),
+        "source": None,
+    })
+    fill("Figures", max(carves // 50, 20), lambda: {
+        "name": text(2).title(),
+        "impact": text(8),
+        "truthsHeld": [text(6)],
+        "symbolicObject": rng.choice(WORDS),
+        "relationshipType": rng.choice(["mentor", "friend", "rival", "kin"]),
+    })
+    fill("Spine", max(carves // 20, 50), lambda: {
+        "statement": text(8),
+        "tags": rng.sample(WORDS, 2),
+        "origin": text(3),
+        "vow": rng.random() < 0.2,
+    })
+    fill("Anchor", 5, lambda: {
+        "name": "Nameless",
+        "role": text(2),
+        "profession": text(2),
+        "truths": [text(6) for _ in range(3)],
+        "symbols": rng.sample(WORDS, 3),
+        "mustNeverForget": [text(6)],
+    })
+    fill("Emberbank", max(carves // 20, 50), lambda: {
+        "question": text(8) + "?",
+        "context": text(20),
+        "tags": rng.sample(WORDS, 2),
+        "resolved": rng.random() < 0.5,
+    })
+    fill("MemoryTriggers", 50, lambda: {"phrase": text(3), "response": text(8)})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake Supabase REST API for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--carves", type=int, default=0, help="Carves to seed")
+    parser.add_argument("--echoes", type=int, default=0, help="Echoes to seed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random delay, up to this much")
+    args = parser.parse_args(argv)
+
+    latency["base"] = args.latency_ms / 1000.0
+    latency["jitter"] = args.jitter_ms / 1000.0
+    seed_corpus(args.carves, args.echoes, args.seed)
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""Drive every route of app.py against the fake Supabase and record latencies.
+
+    python bench/run.py --carves 10000 --echoes 10000 --concurrency 8 --requests 200
+
+Starts bench/fake_supabase.py and app.py as subprocesses, fires
+`--requests` calls per route at `--concurrency`, prints throughput and
+p50/p99 per route and writes the run to bench/results/. Each run is
+compared with the most recent earlier run that used the same settings.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+REGRESSION_THRESHOLD = 0.2  # flag p50/p99 that got 20% slower
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def start_servers(args):
+    supabase_port = free_port()
+    app_port = free_port()
+    supabase_url = f"http://127.0.0.1:{supabase_port}"
+    # Per-request access logs from both servers would drown out the report
+    output = None if args.verbose else subprocess.DEVNULL
+
+    fake = subprocess.Popen([
+        sys.executable, os.path.join(BENCH_DIR, "fake_supabase.py"),
+        "--port", str(supabase_port),
+        "--carves", str(args.carves),
+        "--echoes", str(args.echoes),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--seed", str(args.seed),
+    ], stdout=output, stderr=output)
+    env = {
+        **os.environ,
+        "SUPABASE_URL": supabase_url,
+        "SUPABASE_API_KEY": "bench",
+        "PORT": str(app_port),
+        "ADMISSION_CONTROL": "1" if args.admission_control else "0",
+    }
+    server = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, "app.py")], env=env,
+                              stdout=output, stderr=output)
+
+    # Seeding a large corpus takes a while before the fake starts listening
+    wait_until_up(f"{supabase_url}/rest/v1/Carves?limit=1", timeout=600)
+    wait_until_up(f"http://127.0.0.1:{app_port}/metrics", timeout=60)
+    return fake, server, supabase_url, f"http://127.0.0.1:{app_port}"
+
+
+def sample_ids(supabase_url, table, count=100):
+    res = requests.get(f"{supabase_url}/rest/v1/{table}?select=id&limit={count}")
+    return [row["id"] for row in res.json()]
+
+
+def build_scenarios(supabase_url):
+    # (name, method, path factory, body factory, share of --requests)
+    carve_ids = itertools.cycle(sample_ids(supabase_url, "Carves"))
+    created = []
+    words = ["ember", "spine", "anchor", "river", "silence", "vow", "lantern", "echo"]
+
+    def context():
+        return {"context": " ".join(random.sample(words, 4))}
+
+    def created_carve():
+        return created[random.randrange(len(created))] if created else next(carve_ids)
+
+    return [
+        ("POST /carves", "POST", lambda: "/carves", lambda: {
+            "title": "Bench carve", "summary": "bench", "moments": ["m"],
+            "insights": ["i"], "quotes": ["a short quote"], "closing": "c"
+        }, 1.0, created),
+        ("GET /carves", "GET", lambda: "/carves?after=2025-06-01", None, 0.2, None),
+        ("GET /carves?contains", "GET", lambda: f"/carves?contains={random.choice(words)}", None, 0.2, None),
+        ("GET /carves/recent", "GET", lambda: "/carves/recent", None, 1.0, None),
+        ("GET /carves/<id>", "GET", lambda: f"/carves/{next(carve_ids)}", None, 1.0, None),
+        ("PATCH /carves/<id>", "PATCH", lambda: f"/carves/{created_carve()}", lambda: {"closing": "patched"}, 1.0, None),
+        ("GET /carves/search", "GET", lambda: f"/carves/search?query={random.choice(words)}", None, 0.2, None),
+        ("POST /echoes", "POST", lambda: "/echoes", lambda: {"phrase": "bench echo", "tags": ["ember"]}, 1.0, None),
+        ("GET /echoes", "GET", lambda: f"/echoes?tag={random.choice(words)}", None, 0.2, None),
+        ("POST /spine", "POST", lambda: "/spine", lambda: {"statement": "bench", "tags": ["vow"]}, 1.0, None),
+        ("GET /spine", "GET", lambda: "/spine?vow=true", None, 1.0, None),
+        ("POST /anchor", "POST", lambda: "/anchor", lambda: {"name": "Nameless", "truths": ["t"]}, 1.0, None),
+        ("GET /anchor", "GET", lambda: "/anchor", None, 1.0, None),
+        ("PATCH /anchor", "PATCH", lambda: "/anchor", lambda: {"truths": ["bench"]}, 1.0, None),
+        ("GET /warmup", "GET", lambda: "/warmup", None, 1.0, None),
+        ("POST /figures", "POST", lambda: "/figures", lambda: {"name": "Bench", "impact": "bench"}, 1.0, None),
+        ("GET /figures", "GET", lambda: f"/figures?name={random.choice(words)}", None, 1.0, None),
+        ("GET /listTriggers", "GET", lambda: "/listTriggers", None, 1.0, None),
+        ("POST /updateTrigger", "POST", lambda: "/updateTrigger", lambda: {"phrase": f"bench {random.randrange(20)}"}, 1.0, None),
+        ("GET /recallEchoesByTag", "GET", lambda: f"/recallEchoesByTag?tag={random.choice(words)}", None, 0.2, None),
+        ("GET /listEchoTags", "GET", lambda: "/listEchoTags", None, 0.2, None),
+        ("GET /topEchoTags", "GET", lambda: "/topEchoTags?limit=5", None, 0.2, None),
+        ("GET /listEchoesByTagCount", "GET", lambda: "/listEchoesByTagCount", None, 0.2, None),
+        ("POST /autoCarveStatus", "POST", lambda: "/autoCarveStatus", lambda: {"enabled": True}, 1.0, None),
+        ("GET /autoCarveStatus", "GET", lambda: "/autoCarveStatus", None, 1.0, None),
+        ("POST /traceMode", "POST", lambda: "/traceMode", lambda: {"mode": "logged"}, 1.0, None),
+        ("GET /traceMode", "GET", lambda: "/traceMode", None, 1.0, None),
+        ("POST /runMemoryReflex", "POST", lambda: "/runMemoryReflex", context, 0.2, None),
+        ("POST /emberbank", "POST", lambda: "/emberbank", lambda: {"question": "bench?", "tags": ["ember"]}, 1.0, None),
+        ("GET /emberbank", "GET", lambda: "/emberbank?resolved=false", None, 1.0, None),
+        ("POST /reflexEchoes", "POST", lambda: "/reflexEchoes", context, 0.2, None),
+        ("POST /reflexCarves", "POST", lambda: "/reflexCarves", context, 0.2, None),
+        ("GET /memorySnapshot", "GET", lambda: "/memorySnapshot", None, 0.2, None),
+        ("POST /descentLog", "POST", lambda: "/descentLog", lambda: {"label": "bench", "echo": "bench"}, 1.0, None),
+        ("GET /export", "GET", lambda: "/export?tables=Echoes", None, 0.05, None),
+        ("DELETE /carves/<id>", "DELETE", lambda: f"/carves/{created_carve()}", None, 1.0, None),
+        ("GET /metrics", "GET", lambda: "/metrics", None, 1.0, None),
+    ]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_scenario(base_url, scenario, total, concurrency):
+    name, method, path, body, _, collect = scenario
+    local = threading.local()
+
+    def call(_):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            res = local.session.request(method, base_url + path(), json=body() if body else None, timeout=120)
+            res.content  # drain streamed bodies so the timing covers the whole response
+            status = res.status_code
+            if collect is not None and res.ok:
+                carve = res.json().get("carve")
+                if carve:
+                    collect.append(carve["id"])
+        except requests.RequestException:
+            status = None
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(total)))
+    elapsed = time.perf_counter() - started
+
+    # Only 2xx responses count towards throughput and latency; fast 429/503/404s would flatter both
+    latencies = sorted(latency for latency, status in results if status is not None and 200 <= status < 300)
+    statuses = {}
+    for _, status in results:
+        if status is None or not 200 <= status < 300:
+            key = str(status) if status is not None else "connection"
+            statuses[key] = statuses.get(key, 0) + 1
+    errors = sum(count for key, count in statuses.items() if key == "connection" or int(key) >= 500)
+
+    def ms(value):
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "requests": total,
+        "ok": len(latencies),
+        "non_2xx": total - len(latencies),
+        "errors": errors,
+        "statuses": statuses,
+        "throughput": round(len(latencies) / elapsed, 2),
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p99_ms": ms(percentile(latencies, 99)),
+    }
+
+
+def load_previous(config):
+    if not os.path.isdir(RESULTS_DIR):
+        return None
+    for filename in sorted(os.listdir(RESULTS_DIR), reverse=True):
+        if not filename.endswith(".json"):
+            continue
+        with open(os.path.join(RESULTS_DIR, filename), encoding="utf-8") as f:
+            run = json.load(f)
+        if run.get("config") == config:
+            return run
+    return None
+
+
+def change(current, previous):
+    if not previous or current is None:
+        return ""
+    delta = (current - previous) / previous
+    return f"{delta:+.0%}"
+
+
+def report(routes, previous):
+    previous_routes = previous["routes"] if previous else {}
+    print(f"\n{'route':<28}{'ok req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'non-2xx':>9}{'errors':>8}"
+          "  vs previous (p50/p99)")
+    regressions = []
+    for name, stats in routes.items():
+        before = previous_routes.get(name)
+        comparison = ""
+        if before:
+            comparison = f"{change(stats['p50_ms'], before.get('p50_ms'))} / {change(stats['p99_ms'], before.get('p99_ms'))}"
+            for key in ("p50_ms", "p99_ms"):
+                if before.get(key) and stats[key] is not None and stats[key] > before[key] * (1 + REGRESSION_THRESHOLD):
+                    regressions.append(f"{name} {key}: {before[key]} -> {stats[key]}")
+        p50 = stats["p50_ms"] if stats["p50_ms"] is not None else "-"
+        p99 = stats["p99_ms"] if stats["p99_ms"] is not None else "-"
+        print(f"{name:<28}{stats['throughput']:>10}{p50:>10}{p99:>10}{stats['non_2xx']:>9}{stats['errors']:>8}"
+              f"  {comparison}")
+
+    if regressions:
+        print("\nRegressions:")
+        for line in regressions:
+            print("  " + line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every route against a local Supabase stand-in")
+    parser.add_argument("--carves", type=int, default=10000)
+    parser.add_argument("--echoes", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per route before route weighting")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Simulated Supabase round trip")
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--routes", help="Only run routes whose name contains this text")
+    parser.add_argument("--admission-control", action="store_true", help="Leave rate limiting on")
+    parser.add_argument("--seed", type=int, default=0, help="Seeds both the corpus and the request mix")
+    parser.add_argument("--verbose", action="store_true", help="Show server logs")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    config = {
+        key: getattr(args, key)
+        for key in ("carves", "echoes", "seed", "concurrency", "requests", "latency_ms", "jitter_ms",
+                    "admission_control")
+    }
+
+    fake, server, supabase_url, base_url = start_servers(args)
+    try:
+        routes = {}
+        for scenario in build_scenarios(supabase_url):
+            name, share = scenario[0], scenario[4]
+            if args.routes and args.routes not in name:
+                continue
+            total = max(1, int(args.requests * share))
+            routes[name] = run_scenario(base_url, scenario, total, args.concurrency)
+            stats = routes[name]
+            rejected = f", non-2xx {stats['statuses']}" if stats["non_2xx"] else ""
+            print(f"{name}: {stats['throughput']} ok req/s, p99 {stats['p99_ms']} ms{rejected}", flush=True)
+    finally:
+        server.terminate()
+        fake.terminate()
+        server.wait()
+        fake.wait()
+
+    previous = load_previous(config)
+    regressions = report(routes, previous)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, datetime.utcnow().strftime("%Y%m%dT%H%M%S") + ".json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"timestamp": datetime.utcnow().isoformat(), "config": config, "routes": routes}, f, indent=2)
+    print(f"\nSaved {path}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
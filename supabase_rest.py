@@ -0,0 +1,52 @@
+"""Supabase connection settings and the export format, shared by app.py and transfer.py.
+
+Importing this module has no side effects beyond reading the environment,
+so command-line tools can use it without starting any of the server's
+background machinery.
+"""
+import json
+import os
+
+import requests
+
+SUPABASE_URL = os.environ.get("SUPABASE_URL")
+SUPABASE_API_KEY = os.environ.get("SUPABASE_API_KEY")
+
+HEADERS = {
+    "apikey": SUPABASE_API_KEY,
+    "Authorization": f"Bearer {SUPABASE_API_KEY}",
+    "Content-Type": "application/json",
+    "Prefer": "return=representation"
+}
+
+# Tables covered by /export and transfer.py
+EXPORT_TABLES = ["Carves", "Echoes", "Spine", "Anchor", "Figures", "Emberbank"]
+EXPORT_PAGE_SIZE = 1000
+
+
+def iter_table_rows(table, page_size=EXPORT_PAGE_SIZE, filters=""):
+    # Keyset pagination on id so each page is an index range scan, not an OFFSET
+    last_id = None
+    while True:
+        url = f"{SUPABASE_URL}/rest/v1/{table}?order=id.asc&limit={page_size}{filters}"
+        if last_id is not None:
+            url += f"&id=gt.{last_id}"
+        res = requests.get(url, headers=HEADERS)
+        res.raise_for_status()
+        rows = res.json()
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+def export_line(table, row):
+    return json.dumps({"table": table, "row": row}) + "\n"
+
+
+def export_trailer(rows, error=None):
+    # Last line of every export; a file without `"complete": true` here was cut short
+    trailer = {"table": None, "complete": error is None, "rows": rows}
+    if error is not None:
+        trailer["error"] = error
+    return json.dumps(trailer) + "\n"
@@ -0,0 +1,157 @@
+"""Export and import the memory tables as gzip NDJSON.
+
+    python transfer.py export -o backup.ndjson.gz [--tables Carves,Echoes]
+    python transfer.py import backup.ndjson.gz [--chunk-size 500]
+
+Point SUPABASE_URL / SUPABASE_API_KEY at the source environment when
+exporting and at the target environment when importing. Imports write a
+checkpoint after every chunk and resume from it when rerun; rows that
+already exist are skipped by id. Every export ends with a trailer line,
+and an import fails if that trailer is missing or records an error.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+import requests
+
+from supabase_rest import (
+    EXPORT_TABLES, HEADERS, SUPABASE_URL, export_line, export_trailer, iter_table_rows
+)
+
+
+def report(label, rows, started):
+    elapsed = max(time.monotonic() - started, 1e-6)
+    print(f"{label}: {rows} rows in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)", flush=True)
+
+
+def export_tables(path, tables):
+    started = time.monotonic()
+    total = 0
+    with gzip.open(path, "wt", encoding="utf-8") as out:
+        try:
+            for table in tables:
+                table_started = time.monotonic()
+                count = 0
+                for row in iter_table_rows(table):
+                    out.write(export_line(table, row))
+                    count += 1
+                    total += 1
+                report(table, count, table_started)
+        except Exception as e:
+            out.write(export_trailer(total, str(e)))
+            raise
+        out.write(export_trailer(total))
+    report("export", total, started)
+
+
+def read_checkpoint(path, source):
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("source") != os.path.abspath(source):
+        print(f"Ignoring checkpoint {path}: it belongs to {checkpoint.get('source')}")
+        return 0
+    return checkpoint.get("lines", 0)
+
+
+def write_checkpoint(path, source, lines):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"source": os.path.abspath(source), "lines": lines}, f)
+    os.replace(tmp_path, path)
+
+
+def insert_chunk(table, rows):
+    res = requests.post(
+        f"{SUPABASE_URL}/rest/v1/{table}?on_conflict=id",
+        headers={**HEADERS, "Prefer": "resolution=ignore-duplicates,return=minimal"},
+        json=rows
+    )
+    if not res.ok:
+        raise RuntimeError(f"Bulk insert into {table} failed: {res.status_code} {res.text}")
+
+
+def import_tables(path, chunk_size, checkpoint_path):
+    skip = read_checkpoint(checkpoint_path, path)
+    if skip:
+        print(f"Resuming after line {skip}")
+
+    started = time.monotonic()
+    imported = 0
+    lines = 0
+    table = None
+    chunk = []
+    trailer = None
+
+    def flush():
+        nonlocal imported
+        if not chunk:
+            return
+        insert_chunk(table, chunk)
+        imported += len(chunk)
+        chunk.clear()
+        # Only lines whose rows have been inserted count towards the checkpoint
+        write_checkpoint(checkpoint_path, path, lines)
+        report("import", imported, started)
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if lines < skip:
+                lines += 1
+                continue
+            record = json.loads(line)
+            if record["table"] is None:
+                # Not counted in `lines`, so a resumed import still sees it
+                trailer = record
+                continue
+            if record["table"] not in EXPORT_TABLES:
+                raise ValueError(f"Unknown table in export: {record['table']}")
+            if record["table"] != table or len(chunk) >= chunk_size:
+                flush()
+                table = record["table"]
+            chunk.append(record["row"])
+            lines += 1
+        flush()
+
+    # Rows that did make it are loaded either way; the checkpoint stays so a rerun is cheap
+    if trailer is None:
+        raise RuntimeError(f"{path} has no export trailer; the export was cut short")
+    if not trailer.get("complete"):
+        raise RuntimeError(f"{path} is an incomplete export: {trailer.get('error')}")
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export/import nameless memory tables")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export", help="Stream tables to a gzip NDJSON file")
+    export_cmd.add_argument("-o", "--output", required=True)
+    export_cmd.add_argument("--tables", default=",".join(EXPORT_TABLES))
+
+    import_cmd = commands.add_parser("import", help="Bulk load a gzip NDJSON export")
+    import_cmd.add_argument("input")
+    import_cmd.add_argument("--chunk-size", type=int, default=500)
+    import_cmd.add_argument("--checkpoint", help="Defaults to <input>.checkpoint")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        tables = args.tables.split(",")
+        unknown = [t for t in tables if t not in EXPORT_TABLES]
+        if unknown:
+            parser.error(f"unknown tables: {', '.join(unknown)}")
+        export_tables(args.output, tables)
+    else:
+        import_tables(args.input, args.chunk_size, args.checkpoint or args.input + ".checkpoint")
+
+
+if __name__ == "__main__":
+    sys.exit(main())